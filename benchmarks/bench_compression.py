@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""
+Bandwidth and CPU per request for template responses: uncompressed, compressed
+on every request, and served from the pre-compressed cache.
+
+Run: python benchmarks/bench_compression.py [requests]
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import main
+from main import Parameter, Payload, Signature
+
+SCENARIOS = {
+    'fib/python': ('python', False, Signature(function_name="fib", parameters=[Parameter(name="n", type="int")], returns={"type": "int"})),
+    'mergeKLists/java': ('java', False, Signature(function_name="mergeKLists", parameters=[Parameter(name="lists", type="List[]")], returns={"type": "List"})),
+    'lca/cpp': ('cpp', False, Signature(function_name="lowestCommonAncestor", parameters=[Parameter(name=n, type="Tree") for n in ("root", "p", "q")], returns={"type": "Tree"})),
+    'lca/java-lite': ('java', True, Signature(function_name="lowestCommonAncestor", parameters=[Parameter(name=n, type="Tree") for n in ("root", "p", "q")], returns={"type": "Tree"})),
+}
+
+def cpu_per_request(fn, requests):
+    start = time.process_time()
+    for _ in range(requests):
+        fn()
+    return (time.process_time() - start) / requests * 1e6
+
+def main_bench(requests):
+    print(f"{'scenario':<18}{'encoding':<10}{'bytes':>8}{'ratio':>8}{'per-request us':>16}{'precompressed us':>18}")
+    for name, (language, lite, signature) in SCENARIOS.items():
+        payload = Payload(question_id=name, title=name, description="...", signature=signature, language=language, java_lite=lite)
+        main.template_cache.clear()
+        cached = main.get_cached_template(payload)
+        size = len(cached.body())
+        baseline = cpu_per_request(lambda: main.get_cached_template(payload).variant(None), requests)
+        print(f"{name:<18}{'identity':<10}{size:>8}{1.0:>8.2f}{'-':>16}{baseline:>18.1f}")
+        for encoding, compress in main.compressors.items():
+            compressed = len(compress(cached.body()))
+            on_the_fly = cpu_per_request(lambda: compress(main.get_cached_template(payload).body()), requests)
+            precompressed = cpu_per_request(lambda: main.get_cached_template(payload).variant(encoding), requests)
+            sent = compressed if size >= main.COMPRESSION_MIN_SIZE else size
+            print(f"{'':<18}{encoding:<10}{sent:>8}{size / sent:>8.2f}{on_the_fly:>16.1f}{precompressed:>18.1f}")
+
+if __name__ == "__main__":
+    main_bench(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+"""
+Throughput of /api/v1/template and /api/v1/template/batch with JSON and
+MessagePack bodies, plus the caller-side encode/decode cost of each format.
+
+Needs the optional msgpack package. Run: python benchmarks/bench_msgpack.py [seconds]
+"""
+
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import msgpack
+from fastapi.testclient import TestClient
+import main
+
+BATCH = 32
+
+def payload(function_name, parameters, returns, language):
+    return {
+        "question_id": function_name, "title": function_name, "description": "...",
+        "signature": {
+            "function_name": function_name,
+            "parameters": [{"name": name, "type": t} for name, t in parameters],
+            "returns": {"type": returns},
+        },
+        "language": language,
+    }
+
+PAYLOADS = [
+    payload("fib", [("n", "int")], "int", lang) for lang in ("python", "java", "cpp", "javascript")
+] + [
+    payload("lowestCommonAncestor", [("root", "Tree"), ("p", "Tree"), ("q", "Tree")], "Tree", lang)
+    for lang in ("python", "java", "cpp", "javascript")
+]
+
+FORMATS = {
+    'json': ('application/json', lambda obj: json.dumps(obj).encode(), json.loads),
+    'msgpack': ('application/msgpack', msgpack.packb, msgpack.unpackb),
+}
+
+def rate(fn, seconds):
+    count, start = 0, time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        count += 1
+    return count / (time.perf_counter() - start)
+
+def main_bench(seconds):
+    client = TestClient(main.app)
+    batch = (PAYLOADS * BATCH)[:BATCH]
+    print(f"{'format':<10}{'codec ops/s':>14}{'single req/s':>14}{'batch req/s':>14}{'batch items/s':>15}{'batch bytes':>13}")
+    for name, (media_type, encode, decode) in FORMATS.items():
+        headers = {"Content-Type": media_type, "Accept": media_type, "Accept-Encoding": "identity"}
+        single_bodies = [encode(p) for p in PAYLOADS]
+        batch_body = encode(batch)
+        # Caller side: encode a batch request and decode its response
+        response_body = client.post("/api/v1/template/batch", content=batch_body, headers=headers).content
+        codec = rate(lambda: decode(response_body) and encode(batch), seconds)
+        bodies = itertools.cycle(single_bodies)
+        single = rate(lambda: decode(client.post("/api/v1/template", content=next(bodies), headers=headers).content), seconds)
+        batched = rate(lambda: decode(client.post("/api/v1/template/batch", content=batch_body, headers=headers).content), seconds)
+        print(f"{name:<10}{codec:>14.0f}{single:>14.0f}{batched:>14.0f}{batched * BATCH:>15.0f}{len(response_body):>13}")
+
+if __name__ == "__main__":
+    main_bench(float(sys.argv[1]) if len(sys.argv) > 1 else 2.0)
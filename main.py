@@ -5,10 +5,39 @@ Created on Tue Sep  2 18:29:39 2025
 @author: kalyane
 """
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel, validator
-from typing import List, Dict, Any
+from fastapi import FastAPI, HTTPException, Header, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.routing import APIRoute
+from pydantic import BaseModel, Field, validator
+from typing import Annotated, List, Dict, Any, Optional, Tuple
+from collections import OrderedDict
+import cProfile
+import functools
+import gzip
 import json  # For tests
+import marshal
+import os
+import pstats
+import secrets
+import subprocess
+import sys
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 app = FastAPI()
 
@@ -27,6 +56,7 @@ class Payload(BaseModel):
     description: str
     signature: Signature
     language: str
+    java_lite: bool = False
 
     @validator('language')
     def validate_language(cls, v):
@@ -158,7 +188,199 @@ if __name__ == "__main__":
 
 
 # Similar generator functions for other languages (abbreviated for brevity; full implementations follow the same pattern)
-def generate_java_template(signature: Signature) -> str:
+java_lite_names = {'int': 'Int', 'long': 'Long', 'float': 'Float', 'double': 'Double', 'bool': 'Bool', 'string': 'String', 'List': 'ListNode', 'Tree': 'TreeNode'}
+
+java_lite_primitive_decode = {
+    'int': '((Number) {}).intValue()',
+    'long': '((Number) {}).longValue()',
+    'float': '((Number) {}).floatValue()',
+    'double': '((Number) {}).doubleValue()',
+    'bool': '(Boolean) {}',
+    'string': '(String) {}',
+}
+
+java_lite_reader = r"""
+    static final class JsonReader {
+        private final String s;
+        private int i;
+
+        JsonReader(String s) { this.s = s; }
+
+        Object read() {
+            skip();
+            char c = s.charAt(i);
+            if (c == '{') return readObject();
+            if (c == '[') return readArray();
+            if (c == '"') return readString();
+            if (c == 't') { i += 4; return Boolean.TRUE; }
+            if (c == 'f') { i += 5; return Boolean.FALSE; }
+            if (c == 'n') { i += 4; return null; }
+            return readNumber();
+        }
+
+        private void skip() {
+            while (i < s.length() && s.charAt(i) <= ' ') i++;
+        }
+
+        private Map<String, Object> readObject() {
+            Map<String, Object> res = new HashMap<>();
+            i++;
+            skip();
+            if (s.charAt(i) == '}') { i++; return res; }
+            while (true) {
+                skip();
+                String key = readString();
+                skip();
+                i++;
+                res.put(key, read());
+                skip();
+                if (s.charAt(i++) == '}') return res;
+            }
+        }
+
+        private List<Object> readArray() {
+            List<Object> res = new ArrayList<>();
+            i++;
+            skip();
+            if (s.charAt(i) == ']') { i++; return res; }
+            while (true) {
+                res.add(read());
+                skip();
+                if (s.charAt(i++) == ']') return res;
+            }
+        }
+
+        private String readString() {
+            StringBuilder sb = new StringBuilder();
+            i++;
+            while (true) {
+                char c = s.charAt(i++);
+                if (c == '"') return sb.toString();
+                if (c != '\\') { sb.append(c); continue; }
+                c = s.charAt(i++);
+                switch (c) {
+                    case 'b': sb.append('\b'); break;
+                    case 'f': sb.append('\f'); break;
+                    case 'n': sb.append('\n'); break;
+                    case 'r': sb.append('\r'); break;
+                    case 't': sb.append('\t'); break;
+                    case 'u': sb.append((char) Integer.parseInt(s.substring(i, i + 4), 16)); i += 4; break;
+                    default: sb.append(c);
+                }
+            }
+        }
+
+        private Number readNumber() {
+            int start = i;
+            boolean integral = true;
+            while (i < s.length()) {
+                char c = s.charAt(i);
+                if (c == '.' || c == 'e' || c == 'E') integral = false;
+                else if (c != '-' && c != '+' && (c < '0' || c > '9')) break;
+                i++;
+            }
+            String num = s.substring(start, i);
+            if (integral) return Long.parseLong(num);
+            return Double.parseDouble(num);
+        }
+    }
+"""
+
+java_lite_string_writer = r"""
+    static void writeString(StringBuilder sb, String v) {
+        sb.append('"');
+        for (int i = 0; i < v.length(); i++) {
+            char c = v.charAt(i);
+            if (c == '"' || c == '\\') sb.append('\\').append(c);
+            else if (c < ' ') sb.append(String.format("\\u%04x", (int) c));
+            else sb.append(c);
+        }
+        sb.append('"');
+    }
+"""
+
+def java_lite_decode(dsl_type: str, expr: str, helpers: Dict[str, str]) -> str:
+    """Return a Java expression converting the parsed JSON value `expr` to `dsl_type`.
+
+    Array decoders are emitted once per array type into `helpers`, so the
+    harness only carries code for the DSL types the signature actually uses.
+    """
+    if dsl_type in java_lite_primitive_decode:
+        return java_lite_primitive_decode[dsl_type].format(expr)
+    if dsl_type == 'List':
+        return f"buildListNode({expr})"
+    if dsl_type == 'Tree':
+        return f"buildTreeNode({expr})"
+    if dsl_type == 'Graph':
+        return java_lite_decode('int[][]', expr, helpers)
+    if dsl_type.endswith('[]'):
+        inner = dsl_type[:-2]
+        name = 'decode' + java_lite_names.get(inner.rstrip('[]'), '') + 'Array' * dsl_type.count('[]')
+        if name not in helpers:
+            java_type = get_language_type('java', dsl_type)
+            item = java_lite_decode(inner, 'item', helpers)
+            helpers[name] = f"""
+    static {java_type} {name}(Object o) {{
+        if (o == null) return null;
+        List<?> arr = (List<?>) o;
+        {java_type} res = new ArrayList<>(arr.size());
+        for (Object item : arr) res.add({item});
+        return res;
+    }}
+"""
+        return f"{name}({expr})"
+    raise ValueError(f"Unsupported DSL type: {dsl_type} for language java")
+
+def generate_java_lite_writer(return_dsl: str) -> str:
+    """Return a writeJson method with branches only for the shapes `return_dsl` can produce."""
+    base = return_dsl.rstrip('[]')
+    branches = ["        if (v == null) sb.append(\"null\");\n"]
+    if base == 'string':
+        branches.append("        else if (v instanceof String) writeString(sb, (String) v);\n")
+    if return_dsl.endswith('[]') or return_dsl == 'Graph':
+        branches.append("""        else if (v instanceof List) {
+            sb.append('[');
+            boolean first = true;
+            for (Object item : (List<?>) v) {
+                if (!first) sb.append(',');
+                first = false;
+                writeJson(sb, item);
+            }
+            sb.append(']');
+        }
+""")
+    if base == 'List':
+        branches.append("""        else if (v instanceof ListNode) {
+            sb.append('[');
+            for (ListNode node = (ListNode) v; node != null; node = node.next) {
+                sb.append(node.val);
+                if (node.next != null) sb.append(',');
+            }
+            sb.append(']');
+        }
+""")
+    if base == 'Tree':
+        branches.append("""        else if (v instanceof TreeNode) {
+            TreeNode node = (TreeNode) v;
+            sb.append("{\\"val\\":").append(node.val).append(",\\"left\\":");
+            writeJson(sb, node.left);
+            sb.append(",\\"right\\":");
+            writeJson(sb, node.right);
+            sb.append('}');
+        }
+""")
+    branches.append("        else sb.append(v);\n")
+    writer = ["\n    static void writeJson(StringBuilder sb, Object v) {\n"] + branches + ["    }\n"]
+    if base == 'string':
+        writer.append(java_lite_string_writer)
+    return ''.join(writer)
+
+def generate_java_template(signature: Signature, lite: bool = False) -> str:
+    """Generate the Java template.
+
+    With `lite` the harness uses a small generated JSON reader/writer instead
+    of Gson, so the JVM loads no external jar and no reflection machinery.
+    """
     function_name = signature.function_name
     parameters = signature.parameters
     return_dsl = signature.returns['type']
@@ -167,13 +389,24 @@ def generate_java_template(signature: Signature) -> str:
     uses_listnode = any(t == 'List' for t in [p.type for p in parameters] + [return_dsl])
     uses_treenode = any(t == 'Tree' for t in [p.type for p in parameters] + [return_dsl])
     uses_graph = any(t == 'Graph' for t in [p.type for p in parameters] + [return_dsl])
-    template = [
-        "import java.util.*;\n",
-        "import com.google.gson.*;\n",
-        "import java.io.InputStreamReader;\n",
-        "import java.io.BufferedReader;\n\n",
-        "public class Solution {\n"
-    ]
+    if lite:
+        # The lite decoders and writer also reach nodes nested in arrays
+        dsl_bases = [t.rstrip('[]') for t in [p.type for p in parameters] + [return_dsl]]
+        uses_listnode = 'List' in dsl_bases
+        uses_treenode = 'Tree' in dsl_bases
+        template = [
+            "import java.util.*;\n",
+            "import java.nio.charset.StandardCharsets;\n\n",
+            "public class Solution {\n"
+        ]
+    else:
+        template = [
+            "import java.util.*;\n",
+            "import com.google.gson.*;\n",
+            "import java.io.InputStreamReader;\n",
+            "import java.io.BufferedReader;\n\n",
+            "public class Solution {\n"
+        ]
     if uses_listnode:
         template.append("""
     public static class ListNode {
@@ -183,7 +416,23 @@ def generate_java_template(signature: Signature) -> str:
         ListNode(int val) { this.val = val; }
         ListNode(int val, ListNode next) { this.val = val; this.next = next; }
     }
-
+""")
+        if lite:
+            template.append("""
+    static ListNode buildListNode(Object o) {
+        List<?> arr = (List<?>) o;
+        if (arr == null || arr.isEmpty()) return null;
+        ListNode head = new ListNode(((Number) arr.get(0)).intValue());
+        ListNode curr = head;
+        for (int i = 1; i < arr.size(); i++) {
+            curr.next = new ListNode(((Number) arr.get(i)).intValue());
+            curr = curr.next;
+        }
+        return head;
+    }
+""")
+        else:
+            template.append("""
     public static ListNode buildListNode(JsonArray arr) {
         if (arr == null || arr.size() == 0) return null;
         ListNode head = new ListNode(arr.get(0).getAsInt());
@@ -218,7 +467,20 @@ def generate_java_template(signature: Signature) -> str:
             this.right = right;
         }
     }
-
+""")
+        if lite:
+            template.append("""
+    static TreeNode buildTreeNode(Object o) {
+        if (o == null) return null;
+        Map<?, ?> data = (Map<?, ?>) o;
+        TreeNode node = new TreeNode(((Number) data.get("val")).intValue());
+        node.left = buildTreeNode(data.get("left"));
+        node.right = buildTreeNode(data.get("right"));
+        return node;
+    }
+""")
+        else:
+            template.append("""
     public static TreeNode buildTreeNode(JsonObject data) {
         if (data == null || data.isJsonNull()) return null;
         TreeNode node = new TreeNode(data.get("val").getAsInt());
@@ -242,6 +504,28 @@ def generate_java_template(signature: Signature) -> str:
         template.append("    }\n")
     else:
         template.append("        return null;\n    }\n")
+    if lite:
+        helpers = {}
+        main = ["""
+    public static void main(String[] args) throws Exception {
+        String stdinText = new String(System.in.readAllBytes(), StandardCharsets.UTF_8);
+        Map<?, ?> data = (Map<?, ?>) new JsonReader(stdinText).read();
+        Solution solution = new Solution();
+"""]
+        for p in parameters:
+            decoded = java_lite_decode(p.type, f"data.get(\"{p.name}\")", helpers)
+            main.append(f"        {get_language_type('java', p.type)} {p.name} = {decoded};\n")
+        call_str = ', '.join(p.name for p in parameters)
+        main.append(f"        {return_type} result = solution.{function_name}({call_str});\n")
+        main.append("        StringBuilder jsonOut = new StringBuilder();\n")
+        main.append("        writeJson(jsonOut, result);\n")
+        main.append("        System.out.println(jsonOut);\n")
+        main.append("    }\n}\n")
+        template.extend(helpers.values())
+        template.append(java_lite_reader)
+        template.append(generate_java_lite_writer(return_dsl))
+        template.extend(main)
+        return ''.join(template)
     template.append("""
     public static void main(String[] args) throws Exception {
         BufferedReader br = new BufferedReader(new InputStreamReader(System.in));
@@ -299,6 +583,29 @@ def generate_java_template(signature: Signature) -> str:
     return ''.join(template)
 
 
+def build_java_cds_archive(workdir: str, sample_input: str, java: str = 'java', javac: str = 'javac',
+                           jar: str = 'jar') -> List[str]:
+    """Compile Solution.java in `workdir` and dump an AppCDS archive from one training run.
+
+    The classes are packaged into Solution.jar first: AppCDS only archives
+    application classes loaded from jars, never from a directory classpath.
+    Returns the command that starts the harness from the archive. Requires
+    JDK 13+ for -XX:ArchiveClassesAtExit; best paired with `lite` templates,
+    which load no classes from outside the JDK and the jar.
+    """
+    workdir = os.path.abspath(workdir)
+    archive = os.path.join(workdir, 'Solution.jsa')
+    classpath = os.path.join(workdir, 'Solution.jar')
+    subprocess.run([javac, 'Solution.java'], cwd=workdir, check=True)
+    # Includes nested classes such as Solution$JsonReader.class
+    classes = sorted(f for f in os.listdir(workdir) if f.endswith('.class'))
+    subprocess.run([jar, 'cf', 'Solution.jar'] + classes, cwd=workdir, check=True)
+    subprocess.run(
+        [java, f'-XX:ArchiveClassesAtExit={archive}', '-cp', classpath, 'Solution'],
+        input=sample_input, capture_output=True, text=True, check=True,
+    )
+    return [java, f'-XX:SharedArchiveFile={archive}', '-cp', classpath, 'Solution']
+
 def generate_cpp_template(signature: Signature) -> str:
     function_name = signature.function_name
     parameters = signature.parameters
@@ -515,23 +822,329 @@ const solution = new Solution();
         template.append("result = serializeTreeNode(result);\n")
     template.append("console.log(JSON.stringify(result));\n")
     return ''.join(template)
+def render_template(payload: Payload) -> str:
+    lang = payload.language
+    signature = payload.signature
+    if lang == 'python':
+        template = generate_python_template(signature)
+    elif lang == 'java':
+        template = generate_java_template(signature, lite=payload.java_lite)
+    elif lang == 'cpp':
+        template = generate_cpp_template(signature)
+    elif lang == 'javascript':
+        template = generate_javascript_template(signature)
+    return template
+
+# Response compression. Variants are compressed once per cached template, so
+# the slow, high-ratio levels are affordable here.
+COMPRESSION_MIN_SIZE = 1024
+TEMPLATE_CACHE_SIZE = 1024
+
+compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    compressors['br'] = lambda data: brotli.compress(data, quality=11)
+if zstandard is not None:
+    compressors['zstd'] = lambda data: zstandard.ZstdCompressor(level=19).compress(data)
+
+# Fast levels for bodies compressed on every request, such as batch responses
+fast_compressors = {'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    fast_compressors['br'] = lambda data: brotli.compress(data, quality=4)
+if zstandard is not None:
+    fast_compressors['zstd'] = lambda data: zstandard.ZstdCompressor(level=3).compress(data)
+
+# Preferred order when the client weights several encodings equally
+encoding_preference = ['br', 'zstd', 'gzip']
+
+def parse_accept(header: Optional[str]) -> Dict[str, float]:
+    """Map each value of an Accept or Accept-Encoding header to its q-value."""
+    weights = {}
+    for part in (header or '').split(','):
+        value, _, params = part.partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            param = param.strip()
+            if param.startswith('q='):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if value.strip():
+            weights[value.strip().lower()] = q
+    return weights
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Pick the best available encoding from an Accept-Encoding header, or None for identity."""
+    weights = parse_accept(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in encoding_preference:
+        if encoding not in compressors:
+            continue
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+# Response body formats. MessagePack is for service-to-service callers and
+# needs the optional msgpack package.
+JSON_MEDIA_TYPE = 'application/json'
+MSGPACK_MEDIA_TYPE = 'application/msgpack'
+msgpack_media_types = {'application/msgpack', 'application/x-msgpack', 'application/vnd.msgpack'}
+
+serializers = {JSON_MEDIA_TYPE: lambda obj: json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')}
+if msgpack is not None:
+    serializers[MSGPACK_MEDIA_TYPE] = msgpack.packb
+
+def negotiate_media_type(accept: Optional[str]) -> str:
+    """Return MSGPACK_MEDIA_TYPE if the client prefers MessagePack and it is available, else JSON."""
+    if MSGPACK_MEDIA_TYPE not in serializers:
+        return JSON_MEDIA_TYPE
+    weights = parse_accept(accept)
+    msgpack_q = max(weights.get(t, 0.0) for t in msgpack_media_types)
+    json_q = weights.get(JSON_MEDIA_TYPE, weights.get('application/*', weights.get('*/*', 0.0)))
+    if msgpack_q > 0 and msgpack_q >= json_q:
+        return MSGPACK_MEDIA_TYPE
+    return JSON_MEDIA_TYPE
+
+def join_bodies(bodies: List[bytes], media_type: str) -> bytes:
+    """Concatenate serialized results into one array body without re-encoding them."""
+    if media_type == MSGPACK_MEDIA_TYPE:
+        return msgpack.Packer().pack_array_header(len(bodies)) + b''.join(bodies)
+    return b'[' + b','.join(bodies) + b']'
+
+class CachedTemplate:
+    def __init__(self, language: str, template: str):
+        self.result = {"language": language, "template": template}
+        self.bodies: Dict[str, bytes] = {}
+        self.encoded: Dict[Tuple[str, str], bytes] = {}
+
+    def body(self, media_type: str = JSON_MEDIA_TYPE) -> bytes:
+        data = self.bodies.get(media_type)
+        if data is None:
+            data = self.bodies[media_type] = serializers[media_type](self.result)
+        return data
+
+    def variant(self, encoding: Optional[str], media_type: str = JSON_MEDIA_TYPE) -> Tuple[bytes, Optional[str]]:
+        """Return the body in `encoding`, compressing on first use; small bodies are always sent as-is."""
+        body = self.body(media_type)
+        if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+            return body, None
+        data = self.encoded.get((media_type, encoding))
+        if data is None:
+            data = self.encoded[(media_type, encoding)] = compressors[encoding](body)
+        return data, encoding
+
+template_cache = OrderedDict()
+template_cache_lock = threading.Lock()
+
+def get_cached_template(payload: Payload) -> CachedTemplate:
+    key = (payload.language, payload.java_lite, payload.signature.model_dump_json())
+    with template_cache_lock:
+        cached = template_cache.get(key)
+        if cached is not None:
+            template_cache.move_to_end(key)
+            return cached
+    cached = CachedTemplate(payload.language, render_template(payload))
+    with template_cache_lock:
+        template_cache[key] = cached
+        if len(template_cache) > TEMPLATE_CACHE_SIZE:
+            template_cache.popitem(last=False)
+    return cached
+
+class MsgPackRequest(Request):
+    async def json(self) -> Any:
+        if not hasattr(self, '_json'):
+            self._json = msgpack.unpackb(await self.body(), raw=False)
+        return self._json
+
+class MsgPackRoute(APIRoute):
+    """Route that also accepts MessagePack bodies.
+
+    The body is decoded by MsgPackRequest and then validated by FastAPI exactly
+    like a JSON body, so Payload validation and error responses are shared.
+    """
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+            if content_type in msgpack_media_types:
+                if msgpack is None:
+                    raise HTTPException(status_code=415, detail="MessagePack support requires the msgpack package")
+                # FastAPI parses bodies without a content type via request.json()
+                scope = dict(request.scope)
+                scope['headers'] = [(k, v) for k, v in scope['headers'] if k != b'content-type']
+                request = MsgPackRequest(scope, request.receive)
+            return await handler(request)
+
+        return route_handler
+
+app.router.route_class = MsgPackRoute
+
+MAX_BATCH_SIZE = 256
+
+def msgpack_body(schema: Dict[str, Any]) -> Dict[str, Any]:
+    return {"requestBody": {"content": {MSGPACK_MEDIA_TYPE: {"schema": schema}}}}
+
+def template_response(body: bytes, media_type: str, encoding: Optional[str]) -> Response:
+    headers = {'Vary': 'Accept, Accept-Encoding'}
+    if encoding is not None:
+        headers['Content-Encoding'] = encoding
+    return Response(content=body, status_code=201, media_type=media_type, headers=headers)
+
+# On-demand profiling for live workers. Disabled unless TEMPLATE_PROFILER_TOKEN
+# is set: then no admin route is registered and endpoints are not wrapped.
+PROFILER_TOKEN = os.environ.get('TEMPLATE_PROFILER_TOKEN', '')
+MAX_PROFILE_SECONDS = 60.0
+MIN_SAMPLE_INTERVAL_MS = 1.0
+MAX_SAMPLE_INTERVAL_MS = 1000.0
+
+# Threads whose innermost frame is in one of these are waiting, not working
+idle_files = {'threading.py', 'selectors.py', 'queue.py'}
+
+class RequestProfile:
+    """Aggregates cProfile stats over the next `requests` profiled endpoint calls.
+
+    Profiled calls are serialized, since only one cProfile can be active at a
+    time on newer interpreters.
+    """
+    def __init__(self, requests: int):
+        self.remaining = requests
+        self.stats: Optional[pstats.Stats] = None
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+
+    def run(self, endpoint, args, kwargs):
+        with self.lock:
+            if self.done.is_set():
+                return endpoint(*args, **kwargs)
+            profile = cProfile.Profile()
+            try:
+                return profile.runcall(endpoint, *args, **kwargs)
+            finally:
+                if self.stats is None:
+                    self.stats = pstats.Stats(profile)
+                else:
+                    self.stats.add(profile)
+                self.remaining -= 1
+                if self.remaining <= 0:
+                    self.done.set()
+
+    def finish(self) -> Optional[pstats.Stats]:
+        with self.lock:
+            self.done.set()
+            return self.stats
+
+profile_capture: Optional[RequestProfile] = None
+
+def profiled(endpoint):
+    """Let the admin profiler capture `endpoint`; returns it unchanged when profiling is not configured."""
+    if not PROFILER_TOKEN:
+        return endpoint
+
+    @functools.wraps(endpoint)
+    def wrapper(*args, **kwargs):
+        capture = profile_capture
+        if capture is None:
+            return endpoint(*args, **kwargs)
+        return capture.run(endpoint, args, kwargs)
+
+    return wrapper
+
+def sample_stacks(seconds: float, interval: float) -> str:
+    """Sample the stacks of all busy threads for `seconds`; return them in collapsed-stack (flamegraph) format."""
+    counts: Dict[str, int] = {}
+    me = threading.get_ident()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == me or os.path.basename(frame.f_code.co_filename) in idle_files:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            key = ';'.join(reversed(stack))
+            counts[key] = counts.get(key, 0) + 1
+        time.sleep(interval)
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(counts.items()))
+
 # Endpoint
-@app.post("/api/v1/template", status_code=201)
-def generate_template(payload: Payload):
+@app.post("/api/v1/template", status_code=201,
+          openapi_extra=msgpack_body({"$ref": "#/components/schemas/Payload"}))
+@profiled
+def generate_template(payload: Payload, accept: Optional[str] = Header(None),
+                      accept_encoding: Optional[str] = Header(None)):
     try:
-        lang = payload.language
-        signature = payload.signature
-        if lang == 'python':
-            template = generate_python_template(signature)
-        elif lang == 'java':
-            template = generate_java_template(signature)
-        elif lang == 'cpp':
-            template = generate_cpp_template(signature)
-        elif lang == 'javascript':
-            template = generate_javascript_template(signature)
-        return {"language": lang, "template": template}
+        cached = get_cached_template(payload)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    media_type = negotiate_media_type(accept)
+    body, encoding = cached.variant(negotiate_encoding(accept_encoding), media_type)
+    return template_response(body, media_type, encoding)
+
+@app.post("/api/v1/template/batch", status_code=201,
+          openapi_extra=msgpack_body({"type": "array", "items": {"$ref": "#/components/schemas/Payload"},
+                                       "maxItems": MAX_BATCH_SIZE}))
+@profiled
+def generate_template_batch(payloads: Annotated[List[Payload], Field(max_length=MAX_BATCH_SIZE)],
+                            accept: Optional[str] = Header(None), accept_encoding: Optional[str] = Header(None)):
+    media_type = negotiate_media_type(accept)
+    bodies = []
+    for i, payload in enumerate(payloads):
+        try:
+            bodies.append(get_cached_template(payload).body(media_type))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"payloads[{i}]: {e}")
+    body = join_bodies(bodies, media_type)
+    # A batch is a one-off combination, so it is compressed per request at a fast level.
+    encoding = negotiate_encoding(accept_encoding)
+    if encoding is None or len(body) < COMPRESSION_MIN_SIZE:
+        return template_response(body, media_type, None)
+    return template_response(fast_compressors[encoding](body), media_type, encoding)
+
+if PROFILER_TOKEN:
+    profile_lock = threading.Lock()
+
+    @app.post("/api/v1/admin/profile", include_in_schema=False)
+    async def capture_profile(seconds: float = 10.0, requests: Optional[int] = None, interval_ms: float = 5.0,
+                              x_admin_token: Optional[str] = Header(None)):
+        """Profile this worker.
+
+        With `requests`, returns cProfile stats (pstats dump) for the next N
+        template requests, or whatever ran before `seconds` elapsed. Otherwise
+        samples all threads for `seconds` and returns collapsed stacks.
+        """
+        global profile_capture
+        # Header values arrive latin-1 decoded; compare raw bytes so non-ASCII tokens work
+        if not x_admin_token or not secrets.compare_digest(x_admin_token.encode('latin-1'), PROFILER_TOKEN.encode()):
+            raise HTTPException(status_code=403, detail="Forbidden")
+        if not 0 < seconds <= MAX_PROFILE_SECONDS:
+            raise HTTPException(status_code=400, detail=f"seconds must be in (0, {MAX_PROFILE_SECONDS}]")
+        if not MIN_SAMPLE_INTERVAL_MS <= interval_ms <= MAX_SAMPLE_INTERVAL_MS:
+            raise HTTPException(status_code=400,
+                                detail=f"interval_ms must be in [{MIN_SAMPLE_INTERVAL_MS}, {MAX_SAMPLE_INTERVAL_MS}]")
+        if requests is not None and requests < 1:
+            raise HTTPException(status_code=400, detail="requests must be positive")
+        if not profile_lock.acquire(blocking=False):
+            raise HTTPException(status_code=409, detail="A profile is already being captured")
+        try:
+            if requests is None:
+                collapsed = await run_in_threadpool(sample_stacks, seconds, interval_ms / 1000)
+                return Response(content=collapsed, media_type='text/plain')
+            capture = profile_capture = RequestProfile(requests)
+            try:
+                await run_in_threadpool(capture.done.wait, seconds)
+            finally:
+                profile_capture = None
+            stats = await run_in_threadpool(capture.finish)
+            if stats is None:
+                return Response(status_code=204)
+            return Response(content=marshal.dumps(stats.stats), media_type='application/octet-stream',
+                            headers={'Content-Disposition': 'attachment; filename="template.pstats"'})
+        finally:
+            profile_lock.release()
 
 if __name__ == "__main__":
     import uvicorn
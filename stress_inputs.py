@@ -0,0 +1,309 @@
+# -*- coding: utf-8 -*-
+"""
+Stress-input generator: streams large JSON test inputs matching a Signature.
+
+Each input is one JSON object per line, keyed by parameter name, in the same
+shape the generated templates read from STDIN. Numbers are drawn in batches
+from random bytes and written chunk by chunk, so memory stays bounded by the
+batch size however large the input is.
+
+Usage:
+    python stress_inputs.py signature.json --size 1000000 --count 3 --seed 7 \
+        --shape nums=sorted --shape root=left -o inputs.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import random
+import sys
+from array import array
+from string import ascii_lowercase
+from typing import IO, Dict, Iterator, List, Optional, Tuple
+
+from main import Signature, get_language_type
+
+BATCH = 1 << 16
+
+value_ranges = {'int': (-10**9, 10**9), 'long': (-10**18, 10**18), 'float': (-1e9, 1e9), 'double': (-1e9, 1e9)}
+
+shapes = {
+    'array': ('random', 'sorted', 'reversed', 'constant'),
+    'Tree': ('balanced', 'left', 'right'),
+    'Graph': ('sparse', 'dense'),
+}
+
+def shape_kind(dsl_type: str) -> str:
+    base = dsl_type.rstrip('[]')
+    if base in ('Tree', 'Graph'):
+        return base
+    return 'array'
+
+class StressInputGenerator:
+    def __init__(self, seed: Optional[int] = None, inner_size: int = 10, str_len: int = 10,
+                 value_range: Optional[Tuple[float, float]] = None, degree: int = 3):
+        if inner_size < 0:
+            raise ValueError(f"inner_size must be >= 0, got {inner_size}")
+        if str_len < 1:
+            raise ValueError(f"str_len must be >= 1, got {str_len}")
+        if degree < 0:
+            raise ValueError(f"degree must be >= 0, got {degree}")
+        if value_range is not None and value_range[0] > value_range[1]:
+            raise ValueError(f"value_range is inverted: {value_range[0]} > {value_range[1]}")
+        self.rng = random.Random(seed)
+        self.inner_size = inner_size
+        self.str_len = str_len
+        self.value_range = value_range
+        self.degree = degree
+        self.node_values = self.values('int')
+
+    def bounds(self, prim: str) -> Tuple[float, float]:
+        return self.value_range or value_ranges[prim]
+
+    def words(self, k: int) -> array:
+        words = array('Q')
+        words.frombytes(self.rng.randbytes(8 * k))
+        return words
+
+    def batches(self, prim: str, n: int, shape: str = 'random') -> Iterator[List[str]]:
+        """Yield `n` JSON-encoded values of primitive `prim` in lists of at most BATCH."""
+        if shape not in shapes['array'] or (prim in ('bool', 'string') and shape not in ('random', 'constant')):
+            raise ValueError(f"Unsupported shape: {shape} for {prim}[]")
+        if shape == 'constant':
+            value = next(self.batches(prim, 1))[0]
+            while n > 0:
+                k = min(n, BATCH)
+                yield [value] * k
+                n -= k
+            return
+        if prim == 'bool':
+            while n > 0:
+                k = min(n, BATCH)
+                yield ['true' if w & 1 else 'false' for w in self.words(k)]
+                n -= k
+            return
+        if prim == 'string':
+            while n > 0:
+                k = min(n, BATCH)
+                chars = ''.join(self.rng.choices(ascii_lowercase, k=k * self.str_len))
+                yield [f'"{chars[i:i + self.str_len]}"' for i in range(0, len(chars), self.str_len)]
+                n -= k
+            return
+        lo, hi = self.bounds(prim)
+        if shape in ('sorted', 'reversed'):
+            # Monotonic random walk from one bound towards the other; never
+            # materialises the whole array to sort it. The mean step covers
+            # half the range over n values, so the walk rarely hits the bound.
+            scale = (hi - lo) / max(n, 1) / 2**64
+            current = lo if shape == 'sorted' else hi
+            sign = 1 if shape == 'sorted' else -1
+            while n > 0:
+                k = min(n, BATCH)
+                walk = itertools.accumulate((sign * w * scale for w in self.words(k)), initial=current)
+                batch = [min(max(v, lo), hi) for v in itertools.islice(walk, 1, None)]
+                current = batch[-1]
+                yield [str(int(v)) for v in batch] if prim in ('int', 'long') else [repr(v) for v in batch]
+                n -= k
+            return
+        while n > 0:
+            k = min(n, BATCH)
+            yield [str(v) for v in self.draw(prim, k)]
+            n -= k
+
+    def draw(self, prim: str, k: int) -> List[float]:
+        lo, hi = self.bounds(prim)
+        if prim in ('int', 'long'):
+            lo, hi = int(lo), int(hi)
+            span = hi - lo + 1
+            return [lo + w % span for w in self.words(k)]
+        scale = (hi - lo) / 2**53
+        return [lo + (w >> 11) * scale for w in self.words(k)]
+
+    def values(self, prim: str) -> Iterator[float]:
+        while True:
+            yield from self.draw(prim, BATCH)
+
+    def emit(self, dsl_type: str, size: int, shape: Optional[str] = None) -> Iterator[str]:
+        """Yield the JSON text of one value of `dsl_type` in chunks."""
+        kind = shape_kind(dsl_type)
+        shape = shape or shapes[kind][0]
+        if shape not in shapes[kind]:
+            raise ValueError(f"Unsupported shape: {shape} for {dsl_type}")
+        if dsl_type in ('int', 'long', 'float', 'double', 'bool', 'string'):
+            yield next(self.batches(dsl_type, 1))[0]
+        elif dsl_type == 'List':
+            yield from self.emit_array('int', size, shape)
+        elif dsl_type == 'Tree':
+            yield from self.emit_tree(size, shape)
+        elif dsl_type == 'Graph':
+            yield from self.emit_graph(size, shape)
+        elif dsl_type.endswith('[]'):
+            inner = dsl_type[:-2]
+            if inner in value_ranges or inner in ('bool', 'string'):
+                yield from self.emit_array(inner, size, shape)
+            else:
+                # Nested containers take the outer size; each element uses inner_size.
+                yield '['
+                for i in range(size):
+                    if i:
+                        yield ','
+                    yield from self.emit(inner, self.inner_size, shape)
+                yield ']'
+        else:
+            raise ValueError(f"Unsupported DSL type: {dsl_type}")
+
+    def emit_array(self, prim: str, size: int, shape: str) -> Iterator[str]:
+        yield '['
+        first = True
+        for batch in self.batches(prim, size, shape):
+            if not first:
+                yield ','
+            first = False
+            yield ','.join(batch)
+        yield ']'
+
+    def emit_tree(self, size: int, shape: str) -> Iterator[str]:
+        if size == 0:
+            yield 'null'
+            return
+        vals = self.node_values
+        if shape == 'left':
+            for k in self.chunk_sizes(size):
+                yield ''.join('{"val":%d,"left":' % next(vals) for _ in range(k))
+            yield 'null,"right":null}'
+            for k in self.chunk_sizes(size - 1):
+                yield ',"right":null}' * k
+        elif shape == 'right':
+            for k in self.chunk_sizes(size):
+                yield ''.join('{"val":%d,"left":null,"right":' % next(vals) for _ in range(k))
+            yield 'null'
+            for k in self.chunk_sizes(size):
+                yield '}' * k
+        else:
+            # Complete binary tree in heap order, written in preorder with an
+            # explicit stack of O(log size) entries.
+            buf = []
+            stack = [1]
+            while stack:
+                item = stack.pop()
+                if isinstance(item, str):
+                    buf.append(item)
+                elif item > size:
+                    buf.append('null')
+                else:
+                    buf.append('{"val":%d,"left":' % next(vals))
+                    stack.extend(('}', 2 * item + 1, ',"right":', 2 * item))
+                if len(buf) >= BATCH:
+                    yield ''.join(buf)
+                    buf.clear()
+            yield ''.join(buf)
+
+    def emit_graph(self, size: int, shape: str) -> Iterator[str]:
+        """Directed adjacency lists: `sparse` gives each node `degree` out-edges, `dense` about size/2."""
+        yield '['
+        buf = []
+        for node in range(size):
+            if shape == 'dense':
+                bits = format(self.rng.getrandbits(size), f'0{size}b')
+                neighbours = [j for j, b in enumerate(bits) if b == '1' and j != node]
+            else:
+                others = self.rng.sample(range(size - 1), min(self.degree, size - 1))
+                neighbours = [j + (j >= node) for j in others]
+            buf.append('[' + ','.join(map(str, neighbours)) + ']')
+            if len(buf) >= BATCH or shape == 'dense':
+                yield (',' if node >= len(buf) else '') + ','.join(buf)
+                buf.clear()
+        if buf:
+            yield (',' if size > len(buf) else '') + ','.join(buf)
+        yield ']'
+
+    @staticmethod
+    def chunk_sizes(n: int) -> Iterator[int]:
+        while n > 0:
+            yield min(n, BATCH)
+            n -= BATCH
+
+def write_inputs(signature: Signature, out: IO[str], size: int = 1000, count: int = 1,
+                 seed: Optional[int] = None, shape_overrides: Optional[Dict[str, str]] = None,
+                 **options) -> None:
+    """Write `count` JSON test inputs for `signature` to `out`, one per line."""
+    if size < 0:
+        raise ValueError(f"size must be >= 0, got {size}")
+    if count < 0:
+        raise ValueError(f"count must be >= 0, got {count}")
+    shape_overrides = shape_overrides or {}
+    types = {p.name: p.type for p in signature.parameters}
+    for name in shape_overrides:
+        if name not in types:
+            raise ValueError(f"Unknown parameter: {name}")
+    for p in signature.parameters:
+        # Rejects anything the template generators would reject.
+        get_language_type('python', p.type)
+    for name, shape in shape_overrides.items():
+        base = types[name].rstrip('[]')
+        allowed = ('random', 'constant') if base in ('bool', 'string') else shapes[shape_kind(base)]
+        if shape not in allowed:
+            raise ValueError(f"Unsupported shape: {shape} for {types[name]}")
+    generator = StressInputGenerator(seed=seed, **options)
+    for _ in range(count):
+        out.write('{')
+        for i, p in enumerate(signature.parameters):
+            out.write(('' if i == 0 else ',') + json.dumps(p.name) + ':')
+            for chunk in generator.emit(p.type, size, shape_overrides.get(p.name)):
+                out.write(chunk)
+        out.write('}\n')
+
+def parse_assignments(values: List[str]) -> Dict[str, str]:
+    pairs = {}
+    for value in values:
+        name, sep, shape = value.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"Expected NAME=SHAPE, got {value}")
+        pairs[name] = shape
+    return pairs
+
+def parse_range(value: str) -> Tuple[float, float]:
+    lo, sep, hi = value.partition(':')
+    if not sep:
+        raise argparse.ArgumentTypeError(f"Expected LO:HI, got {value}")
+    convert = float if '.' in value or 'e' in value.lower() else int
+    try:
+        lo, hi = convert(lo), convert(hi)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected numeric LO:HI, got {value}")
+    if lo > hi:
+        raise argparse.ArgumentTypeError(f"Inverted range {value}: LO must not exceed HI")
+    return lo, hi
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Stream large JSON test inputs matching a question signature.")
+    parser.add_argument('signature', help="JSON file with a Signature, or a full template request payload")
+    parser.add_argument('--size', type=int, default=1000, help="length of arrays and lists, node count of trees and graphs")
+    parser.add_argument('--inner-size', type=int, default=10, help="size of each element of nested containers")
+    parser.add_argument('--count', type=int, default=1, help="number of inputs to write")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--shape', action='append', default=[], metavar='NAME=SHAPE',
+                        help="per-parameter shape: random/sorted/reversed/constant, balanced/left/right, sparse/dense")
+    parser.add_argument('--value-range', type=parse_range, default=None, metavar='LO:HI',
+                        help="bounds for numeric values; write negative bounds as --value-range=-5:5")
+    parser.add_argument('--str-len', type=int, default=10)
+    parser.add_argument('--degree', type=int, default=3, help="out-degree of sparse graphs")
+    parser.add_argument('-o', '--output', default='-', help="output file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    with open(args.signature) as f:
+        data = json.load(f)
+    signature = Signature(**data.get('signature', data))
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', buffering=1 << 20)
+    try:
+        write_inputs(signature, out, size=args.size, count=args.count, seed=args.seed,
+                     shape_overrides=parse_assignments(args.shape), inner_size=args.inner_size,
+                     str_len=args.str_len, value_range=args.value_range, degree=args.degree)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+if __name__ == "__main__":
+    main()
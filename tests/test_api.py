@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+import gzip
+import json
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from fastapi.testclient import TestClient
+import main
+
+client = TestClient(main.app)
+
+def payload(function_name, parameters, returns, language):
+    return {
+        "question_id": function_name,
+        "title": function_name,
+        "description": "...",
+        "signature": {
+            "function_name": function_name,
+            "parameters": [{"name": name, "type": t} for name, t in parameters],
+            "returns": {"type": returns},
+        },
+        "language": language,
+    }
+
+FIB = payload("fib", [("n", "int")], "int", "python")
+LCA = payload("lowestCommonAncestor", [("root", "Tree"), ("p", "Tree"), ("q", "Tree")], "Tree", "java")
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    main.template_cache.clear()
+
+def test_large_template_is_compressed():
+    response = client.post("/api/v1/template", json=LCA, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 201
+    assert response.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["vary"]
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json()["template"] == main.generate_java_template(main.Signature(**LCA["signature"]))
+
+def test_small_template_and_identity_are_uncompressed():
+    small = client.post("/api/v1/template", json=FIB, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    identity = client.post("/api/v1/template", json=LCA, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert small.json()["language"] == "python" and identity.json()["language"] == "java"
+
+def test_variant_is_compressed_once(monkeypatch):
+    calls = []
+    def counting_gzip(data):
+        calls.append(data)
+        return gzip.compress(data)
+    monkeypatch.setitem(main.compressors, "gzip", counting_gzip)
+    for _ in range(3):
+        response = client.post("/api/v1/template", json=LCA, headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+    assert len(calls) == 1
+    assert len(main.template_cache) == 1
+
+def test_negotiate_encoding():
+    assert main.negotiate_encoding(None) is None
+    assert main.negotiate_encoding("gzip;q=0") is None
+    assert main.negotiate_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert main.negotiate_encoding("*") in main.compressors
+
+def test_unsupported_type_is_400():
+    response = client.post("/api/v1/template", json=payload("f", [("m", "Matrix")], "int", "cpp"))
+    assert response.status_code == 400
+    assert "Unsupported DSL type" in response.json()["detail"]
+
+def test_batch_json():
+    response = client.post("/api/v1/template/batch", json=[FIB, LCA])
+    assert response.status_code == 201
+    assert [r["language"] for r in response.json()] == ["python", "java"]
+    assert response.json()[0] == client.post("/api/v1/template", json=FIB).json()
+
+def test_batch_uses_fast_compressors(monkeypatch):
+    def slow_compressor(data):
+        raise AssertionError("batch bodies must not use the max-ratio compressors")
+    monkeypatch.setitem(main.compressors, "gzip", slow_compressor)
+    response = client.post("/api/v1/template/batch", json=[LCA] * 8, headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 201
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(response.json()) == 8
+
+def test_batch_reports_failing_item():
+    response = client.post("/api/v1/template/batch", json=[FIB, payload("f", [("m", "Matrix")], "int", "cpp")])
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("payloads[1]:")
+
+def test_batch_too_large_is_rejected_by_validation(monkeypatch):
+    def unexpected(payload):
+        raise AssertionError("oversized batches must not reach the handler")
+    monkeypatch.setattr(main, "get_cached_template", unexpected)
+    response = client.post("/api/v1/template/batch", json=[FIB] * (main.MAX_BATCH_SIZE + 1))
+    assert response.status_code == 422
+    error = response.json()["detail"][0]
+    assert error["type"] == "too_long"
+    assert f"at most {main.MAX_BATCH_SIZE} items" in error["msg"]
+
+def test_msgpack_round_trip():
+    msgpack = pytest.importorskip("msgpack")
+    headers = {"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+    response = client.post("/api/v1/template", content=msgpack.packb(LCA), headers=headers)
+    assert response.status_code == 201
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content) == client.post("/api/v1/template", json=LCA).json()
+
+def test_msgpack_batch_and_json_accept():
+    msgpack = pytest.importorskip("msgpack")
+    body = msgpack.packb([FIB, LCA])
+    response = client.post("/api/v1/template/batch", content=body,
+                           headers={"Content-Type": "application/x-msgpack", "Accept": "application/msgpack"})
+    assert [r["language"] for r in msgpack.unpackb(response.content)] == ["python", "java"]
+    response = client.post("/api/v1/template/batch", content=body, headers={"Content-Type": "application/msgpack"})
+    assert response.headers["content-type"] == "application/json"
+    assert len(response.json()) == 2
+
+def test_msgpack_body_is_validated_like_json():
+    msgpack = pytest.importorskip("msgpack")
+    invalid = dict(FIB, language="rust")
+    from_msgpack = client.post("/api/v1/template", content=msgpack.packb(invalid),
+                               headers={"Content-Type": "application/msgpack"})
+    from_json = client.post("/api/v1/template", content=json.dumps(invalid),
+                            headers={"Content-Type": "application/json"})
+    assert from_msgpack.status_code == from_json.status_code == 422
+    assert from_msgpack.json() == from_json.json()
+    malformed = client.post("/api/v1/template", content=b"\xc1", headers={"Content-Type": "application/msgpack"})
+    assert malformed.status_code == 400
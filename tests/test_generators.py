@@ -6,6 +6,8 @@ Created on Wed Sep  3 15:58:23 2025
 """
 
 import pytest
+import shutil
+import subprocess
 import sys
 import os
 
@@ -16,6 +18,9 @@ from main import (
     Parameter,
     generate_python_template,
     generate_java_template,
+    generate_java_lite_writer,
+    java_lite_decode,
+    build_java_cds_archive,
     generate_cpp_template,
     generate_javascript_template,
 )
@@ -189,4 +194,122 @@ def test_detect_cycle_javascript(snapshot):
         returns={"type": "bool"},
     )
     template = generate_javascript_template(sig)
-    assert snapshot == template
\ No newline at end of file
+    assert snapshot == template
+
+# Scenario 5: Dependency-free Java harness (lite=True) for the scenarios above
+def test_fibonacci_java_lite(snapshot):
+    sig = Signature(
+        function_name="fib",
+        parameters=[Parameter(name="n", type="int")],
+        returns={"type": "int"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert "gson" not in template.lower()
+    assert snapshot == template
+
+def test_merge_k_lists_java_lite(snapshot):
+    sig = Signature(
+        function_name="mergeKLists",
+        parameters=[Parameter(name="lists", type="List[]")],
+        returns={"type": "List"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert snapshot == template
+
+def test_lowest_common_ancestor_java_lite(snapshot):
+    sig = Signature(
+        function_name="lowestCommonAncestor",
+        parameters=[
+            Parameter(name="root", type="Tree"),
+            Parameter(name="p", type="Tree"),
+            Parameter(name="q", type="Tree"),
+        ],
+        returns={"type": "Tree"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert snapshot == template
+
+def test_detect_cycle_java_lite(snapshot):
+    sig = Signature(
+        function_name="detectCycle",
+        parameters=[Parameter(name="graph", type="Graph")],
+        returns={"type": "bool"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert snapshot == template
+
+def test_tree_array_java_lite(snapshot):
+    sig = Signature(
+        function_name="mirrorAll",
+        parameters=[Parameter(name="ts", type="Tree[]")],
+        returns={"type": "Tree[]"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert "public static class TreeNode" in template
+    assert "static TreeNode buildTreeNode(Object o)" in template
+    assert snapshot == template
+
+def test_list_array_java_lite_defines_listnode():
+    sig = Signature(
+        function_name="countNodes",
+        parameters=[Parameter(name="lists", type="List[]")],
+        returns={"type": "int"},
+    )
+    template = generate_java_template(sig, lite=True)
+    assert "public static class ListNode" in template
+    assert "static ListNode buildListNode(Object o)" in template
+
+def test_java_lite_harness_locals_do_not_clash_with_parameters():
+    sig = Signature(
+        function_name="echo",
+        parameters=[Parameter(name="input", type="string"), Parameter(name="out", type="int[]")],
+        returns={"type": "string"},
+    )
+    template = generate_java_template(sig, lite=True)
+    main_body = template[template.index("public static void main"):]
+    assert main_body.count("String input ") == 1
+    assert "StringBuilder out " not in main_body
+    assert "List<Integer> out = decodeIntArray(data.get(\"out\"));" in main_body
+
+def test_build_java_cds_archive(monkeypatch, tmp_path):
+    calls = []
+    def fake_run(cmd, **kwargs):
+        calls.append((cmd, kwargs))
+        if cmd[0] == "javac":
+            for name in ("Solution.class", "Solution$JsonReader.class"):
+                (tmp_path / name).write_bytes(b"")
+    monkeypatch.setattr(main.subprocess, "run", fake_run)
+    workdir = str(tmp_path)
+    archive = os.path.join(workdir, "Solution.jsa")
+    classpath = os.path.join(workdir, "Solution.jar")
+    command = build_java_cds_archive(workdir, '{"n": 5}')
+    (javac_cmd, javac_kwargs), (jar_cmd, jar_kwargs), (java_cmd, java_kwargs) = calls
+    assert javac_cmd == ["javac", "Solution.java"]
+    assert javac_kwargs["cwd"] == workdir and javac_kwargs["check"]
+    assert jar_cmd == ["jar", "cf", "Solution.jar", "Solution$JsonReader.class", "Solution.class"]
+    assert jar_kwargs["cwd"] == workdir and jar_kwargs["check"]
+    assert java_cmd == ["java", f"-XX:ArchiveClassesAtExit={archive}", "-cp", classpath, "Solution"]
+    assert java_kwargs["input"] == '{"n": 5}' and java_kwargs["check"]
+    assert command == ["java", f"-XX:SharedArchiveFile={archive}", "-cp", classpath, "Solution"]
+
+@pytest.mark.skipif(not all(shutil.which(tool) for tool in ("java", "javac", "jar")), reason="needs a JDK")
+def test_build_java_cds_archive_with_jdk(tmp_path):
+    sig = Signature(
+        function_name="identity",
+        parameters=[Parameter(name="root", type="Tree"), Parameter(name="input", type="string")],
+        returns={"type": "Tree"},
+    )
+    (tmp_path / "Solution.java").write_text(generate_java_template(sig, lite=True))
+    sample = '{"root": {"val": 1, "left": null, "right": null}, "input": "x"}'
+    command = build_java_cds_archive(str(tmp_path), sample)
+    assert (tmp_path / "Solution.jsa").is_file()
+    result = subprocess.run(command, input=sample, capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "null"
+
+def test_java_lite_decoders_only_for_used_types():
+    helpers = {}
+    expr = java_lite_decode('string[][]', 'x', helpers)
+    assert expr == "decodeStringArrayArray(x)"
+    assert list(helpers) == ["decodeStringArray", "decodeStringArrayArray"]
+    writer = generate_java_lite_writer('int')
+    assert "ListNode" not in writer and "writeString" not in writer
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import importlib.util
+import marshal
+import pytest
+import sys
+import os
+import threading
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+from fastapi.testclient import TestClient
+import main
+
+FIB = {
+    "question_id": "fib", "title": "Fibonacci", "description": "...",
+    "signature": {"function_name": "fib", "parameters": [{"name": "n", "type": "int"}], "returns": {"type": "int"}},
+    "language": "python",
+}
+
+# Large enough that rendering dominates each request, so the sampler catches it
+BIG_TYPES = ["int[]", "Tree", "List[]", "string[][]", "Graph", "double"]
+BIG = {
+    "question_id": "big", "title": "Big", "description": "...",
+    "signature": {
+        "function_name": "solve",
+        "parameters": [{"name": f"p{i}", "type": BIG_TYPES[i % len(BIG_TYPES)]} for i in range(1000)],
+        "returns": {"type": "Tree[]"},
+    },
+    "language": "java",
+    "java_lite": True,
+}
+
+def load_profiled_main(monkeypatch, token):
+    # Profiling is configured at import time, so load a separate copy of main.py
+    monkeypatch.setenv("TEMPLATE_PROFILER_TOKEN", token)
+    spec = importlib.util.spec_from_file_location("main_profiled", os.path.join(ROOT, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def profiled_main(monkeypatch):
+    return load_profiled_main(monkeypatch, "secret")
+
+def generate_load(module, client, stop):
+    while not stop.is_set():
+        module.template_cache.clear()
+        assert client.post("/api/v1/template", json=BIG).status_code == 201
+
+def test_disabled_by_default():
+    assert not main.PROFILER_TOKEN
+    assert main.profiled(main.render_template) is main.render_template
+    assert all(route.path != "/api/v1/admin/profile" for route in main.app.routes)
+    assert TestClient(main.app).post("/api/v1/admin/profile").status_code == 404
+
+def test_requires_admin_token(profiled_main):
+    client = TestClient(profiled_main.app)
+    assert client.post("/api/v1/admin/profile", params={"seconds": 0.1}).status_code == 403
+    assert client.post("/api/v1/admin/profile", params={"seconds": 0.1},
+                       headers={"X-Admin-Token": "wrong"}).status_code == 403
+    assert client.post("/api/v1/admin/profile", params={"seconds": 0.1},
+                       headers={"X-Admin-Token": "s\u00e9cret".encode()}).status_code == 403
+    assert client.post("/api/v1/admin/profile", params={"seconds": 600},
+                       headers={"X-Admin-Token": "secret"}).status_code == 400
+    for interval_ms in (0, -5, 5000):
+        assert client.post("/api/v1/admin/profile", params={"seconds": 0.1, "interval_ms": interval_ms},
+                           headers={"X-Admin-Token": "secret"}).status_code == 400
+
+def test_non_ascii_admin_token(monkeypatch):
+    module = load_profiled_main(monkeypatch, "s\u00e9cret")
+    client = TestClient(module.app)
+    assert client.post("/api/v1/admin/profile", params={"seconds": 0.05},
+                       headers={"X-Admin-Token": "s\u00e9cret".encode()}).status_code == 200
+    assert client.post("/api/v1/admin/profile", params={"seconds": 0.05},
+                       headers={"X-Admin-Token": "secret"}).status_code == 403
+
+def test_request_profile_returns_pstats(profiled_main):
+    with TestClient(profiled_main.app) as client:
+        result = {}
+        def capture():
+            result["response"] = client.post("/api/v1/admin/profile", params={"requests": 2, "seconds": 10},
+                                             headers={"X-Admin-Token": "secret"})
+        thread = threading.Thread(target=capture)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while profiled_main.profile_capture is None:
+            assert time.monotonic() < deadline, "profile capture never started"
+            time.sleep(0.01)
+        for _ in range(2):
+            assert client.post("/api/v1/template", json=FIB).status_code == 201
+        thread.join()
+    response = result["response"]
+    assert response.status_code == 200
+    stats = marshal.loads(response.content)
+    assert any(func == "render_template" for (_, _, func) in stats)
+    assert profiled_main.profile_capture is None
+
+def test_sampling_profile_returns_collapsed_stacks(profiled_main):
+    with TestClient(profiled_main.app) as client:
+        stop = threading.Event()
+        load = threading.Thread(target=generate_load, args=(profiled_main, client, stop))
+        load.start()
+        try:
+            response = client.post("/api/v1/admin/profile", params={"seconds": 0.5, "interval_ms": 1},
+                                   headers={"X-Admin-Token": "secret"})
+        finally:
+            stop.set()
+            load.join()
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    lines = response.text.splitlines()
+    assert lines
+    for line in lines:
+        stack, count = line.rsplit(" ", 1)
+        assert stack and int(count) > 0
+    assert any("generate_template (" in line for line in lines)
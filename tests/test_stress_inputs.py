@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+import io
+import json
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from main import Signature, Parameter
+from stress_inputs import write_inputs
+
+def generate(params, **kwargs):
+    sig = Signature(
+        function_name="f",
+        parameters=[Parameter(name=name, type=t) for name, t in params],
+        returns={"type": "int"},
+    )
+    out = io.StringIO()
+    write_inputs(sig, out, **kwargs)
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+def tree_size_and_depth(node):
+    if node is None:
+        return 0, 0
+    ls, ld = tree_size_and_depth(node['left'])
+    rs, rd = tree_size_and_depth(node['right'])
+    return ls + rs + 1, max(ld, rd) + 1
+
+def test_inputs_match_signature_and_size():
+    params = [("nums", "int[]"), ("target", "int"), ("head", "List"), ("words", "string[]"), ("grid", "int[][]")]
+    inputs = generate(params, size=50, count=3, seed=1, inner_size=4)
+    assert len(inputs) == 3
+    for data in inputs:
+        assert list(data) == ["nums", "target", "head", "words", "grid"]
+        assert len(data["nums"]) == 50 and len(data["head"]) == 50
+        assert isinstance(data["target"], int)
+        assert all(isinstance(w, str) for w in data["words"])
+        assert len(data["grid"]) == 50 and all(len(row) == 4 for row in data["grid"])
+
+def test_same_seed_is_reproducible():
+    params = [("nums", "double[]"), ("root", "Tree"), ("graph", "Graph")]
+    assert generate(params, size=100, seed=7) == generate(params, size=100, seed=7)
+    assert generate(params, size=100, seed=7) != generate(params, size=100, seed=8)
+
+def test_array_shapes_span_batches():
+    inputs = generate([("a", "int[]"), ("b", "long[]"), ("c", "int[]")], size=70000, seed=3,
+                      shape_overrides={"a": "sorted", "b": "reversed", "c": "constant"}, value_range=(1, 10**4))
+    a, b, c = inputs[0]["a"], inputs[0]["b"], inputs[0]["c"]
+    assert a == sorted(a) and b == sorted(b, reverse=True)
+    assert len(set(c)) == 1
+    assert all(1 <= v <= 10**4 for v in a + b + c)
+
+@pytest.mark.parametrize("shape, depth", [("balanced", 7), ("left", 100), ("right", 100)])
+def test_tree_shapes(shape, depth):
+    root = generate([("root", "Tree")], size=100, seed=2, shape_overrides={"root": shape})[0]["root"]
+    assert tree_size_and_depth(root) == (100, depth)
+
+def test_graph_density():
+    sparse = generate([("g", "Graph")], size=200, seed=4, degree=3)[0]["g"]
+    dense = generate([("g", "Graph")], size=200, seed=4, shape_overrides={"g": "dense"})[0]["g"]
+    assert len(sparse) == len(dense) == 200
+    assert all(len(adj) == 3 and i not in adj for i, adj in enumerate(sparse))
+    assert sum(map(len, dense)) > 200 * 50
+    assert all(i not in adj and all(0 <= j < 200 for j in adj) for i, adj in enumerate(dense))
+
+def test_invalid_inputs_rejected():
+    with pytest.raises(ValueError):
+        generate([("x", "Matrix")], size=10)
+    with pytest.raises(ValueError):
+        generate([("root", "Tree")], size=10, shape_overrides={"root": "sorted"})
+    with pytest.raises(ValueError):
+        generate([("words", "string[]")], size=10, shape_overrides={"words": "sorted"})
+    with pytest.raises(ValueError):
+        generate([("nums", "int[]")], size=10, shape_overrides={"other": "sorted"})
+
+@pytest.mark.parametrize("kwargs", [
+    {"value_range": (5, 1)},
+    {"str_len": 0},
+    {"size": -1},
+    {"inner_size": -1},
+    {"degree": -1},
+])
+def test_invalid_options_rejected(kwargs):
+    options = dict({"size": 10}, **kwargs)
+    with pytest.raises(ValueError):
+        generate([("words", "string[]"), ("nums", "int[]")], **options)
+
+def test_cli_rejects_inverted_range(tmp_path, capsys):
+    from stress_inputs import main as cli
+    sig = tmp_path / "sig.json"
+    sig.write_text(json.dumps({"function_name": "f", "parameters": [{"name": "n", "type": "int"}],
+                               "returns": {"type": "int"}}))
+    with pytest.raises(SystemExit):
+        cli([str(sig), "--value-range", "5:1"])
+    assert "Inverted range" in capsys.readouterr().err
+    out = tmp_path / "out.jsonl"
+    cli([str(sig), "--value-range=-5:5", "--count", "20", "-o", str(out)])
+    assert all(-5 <= json.loads(line)["n"] <= 5 for line in out.read_text().splitlines())